@@ -1,12 +1,49 @@
 """
 Game-related commands for the Discord bot.
 """
+import asyncio
+import logging
+import time
 import discord
 from discord.ext import commands
 import random
+from typing import Optional
 import aiohttp
-import json
-from src.config import DATA_DRAGON_CHAMPION_URL
+import ijson
+from src.config import DATA_DRAGON_CHAMPION_URL, CHAMPION_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# All possible lanes, in display order
+_LANES = ('Top', 'Jungle', 'Mid', 'Bot', 'Support')
+_LANES_SET = frozenset(_LANES)
+
+# Team assignment embed constants
+_BLUE = discord.Color.blue()
+_TEAM_TITLE = "League of Legends Team Assignment"
+_TEAM_DESC = "Here's your team composition!"
+_ASSIGN_DESC = "Here's your team composition with champion suggestions!"
+
+# Champion tags that make a champion a suggestion for each lane
+_LANE_TAGS = {
+    'Top': ('Fighter', 'Tank'),
+    'Jungle': ('Fighter', 'Tank', 'Assassin'),
+    'Mid': ('Mage', 'Assassin'),
+    'Bot': ('Marksman',),
+    'Support': ('Support', 'Tank', 'Mage'),
+}
+
+# Champion data cache shared across invocations (refreshed every CHAMPION_CACHE_TTL seconds).
+# The lock is created on first use so it binds to the bot's running loop, not the import-time one
+_CHAMP_CACHE = {'ts': 0.0, 'champs': None, 'lock': None}
+
+
+def _get_champ_lock() -> asyncio.Lock:
+    """Get the champion cache lock, creating it on first use"""
+    if _CHAMP_CACHE['lock'] is None:
+        _CHAMP_CACHE['lock'] = asyncio.Lock()
+    return _CHAMP_CACHE['lock']
+
 
 class GameCommands(commands.Cog):
     """
@@ -14,8 +51,61 @@ class GameCommands(commands.Cog):
     """
     def __init__(self, bot):
         self.bot = bot
+        self._rng = random.Random()
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the HTTP session shared by all commands in this cog, creating it on first use.
+        
+        The cog is loaded before bot.run() starts the bot's event loop, so the session is
+        created lazily from a command to bind it to the loop it will actually be used on.
+        
+        Returns:
+            aiohttp.ClientSession: The shared session
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+            )
+        return self._session
+    
+    async def cog_unload(self):
+        """Close the shared HTTP session."""
+        if self._session:
+            await self._session.close()
+            self._session = None
+    
+    async def _get_champions(self) -> Optional[dict]:
+        """
+        Get champion names grouped by lane, fetching them from Data Dragon only when the cache is stale.
+        
+        Returns:
+            Optional[dict]: Mapping of lane to list of champion names, or None if the fetch failed
+        """
+        async with _get_champ_lock():
+            if _CHAMP_CACHE['champs'] is None or time.monotonic() - _CHAMP_CACHE['ts'] > CHAMPION_CACHE_TTL:
+                async with self._get_session().get(DATA_DRAGON_CHAMPION_URL) as response:
+                    if response.status != 200:
+                        return None
+                    
+                    # Stream-parse one champion at a time and only keep the fields used for suggestions
+                    champions = [
+                        (champ['name'], champ['tags'])
+                        async for _, champ in ijson.kvitems(response.content, 'data')
+                    ]
+                
+                # Precompute each lane's champion pool once instead of filtering per command
+                _CHAMP_CACHE['champs'] = {
+                    lane: [name for name, champ_tags in champions if any(tag in champ_tags for tag in tags)]
+                    for lane, tags in _LANE_TAGS.items()
+                }
+                _CHAMP_CACHE['ts'] = time.monotonic()
+            
+            return _CHAMP_CACHE['champs']
     
-    def parse_players(self, players_str: str) -> tuple[list, dict]:
+    def parse_players(self, players_str: str) -> tuple[list, dict, list]:
         """
         Parse player string to get list of players and pre-assigned lanes.
         
@@ -23,33 +113,27 @@ class GameCommands(commands.Cog):
             players_str (str): Comma-separated list of players, optionally with pre-assigned lanes
             
         Returns:
-            tuple[list, dict]: List of players and dictionary of pre-assigned lanes
+            tuple[list, dict, list]: List of players, dictionary of pre-assigned lanes
+                and list of players without a pre-assigned lane
         """
-        # Split players by comma and clean up whitespace
-        player_list = [p.strip() for p in players_str.split(',')]
-        
-        # Define all possible lanes
-        lanes = ['Top', 'Jungle', 'Mid', 'Bot', 'Support']
-        
-        # Initialize pre-assigned lanes dictionary
-        pre_assigned = {}
-        clean_players = []
-        
-        for player in player_list:
-            # Check if player has a pre-assigned lane
-            if '-' in player:
-                name, lane = [p.strip() for p in player.split('-')]
-                # Convert lane to proper format (first letter uppercase)
-                lane = lane.capitalize()
-                if lane in lanes:
-                    pre_assigned[name] = lane
-                    clean_players.append(name)
-                else:
-                    clean_players.append(player)
-            else:
-                clean_players.append(player)
-        
-        return clean_players, pre_assigned
+        # Fast path: without any dash there are no pre-assigned lanes
+        if '-' not in players_str:
+            player_list = [p.strip() for p in players_str.split(',')]
+            return player_list, {}, player_list.copy()
+        
+        # Split players by comma and separate any "-lane" suffix (lane is '' when absent)
+        parsed = [
+            (player, name.strip(), lane.strip().capitalize())
+            for player in (p.strip() for p in players_str.split(','))
+            for name, _, lane in [player.partition('-')]
+        ]
+        
+        # Players with a valid lane suffix are pre-assigned under their bare name
+        pre_assigned = {name: lane for _, name, lane in parsed if lane in _LANES_SET}
+        clean_players = [name if lane in _LANES_SET else player for player, name, lane in parsed]
+        remaining_players = [player for player, _, lane in parsed if lane not in _LANES_SET]
+        
+        return clean_players, pre_assigned, remaining_players
     
     @commands.command(name='team')
     async def team_command(self, ctx, *, players: str):
@@ -63,7 +147,7 @@ class GameCommands(commands.Cog):
             players (str): Comma-separated list of players (2-5 players)
         """
         # Parse players and get pre-assigned lanes
-        player_list, pre_assigned = self.parse_players(players)
+        player_list, pre_assigned, remaining_players = self.parse_players(players)
         
         # Validate number of players
         if len(player_list) < 2:
@@ -73,38 +157,30 @@ class GameCommands(commands.Cog):
             await ctx.send("You can only have up to 5 players in a team!")
             return
         
-        # Define all possible lanes
-        lanes = ['Top', 'Jungle', 'Mid', 'Bot', 'Support']
-        
         # Remove pre-assigned lanes from available lanes
-        available_lanes = [lane for lane in lanes if lane not in pre_assigned.values()]
+        available_lanes = [lane for lane in _LANES if lane not in pre_assigned.values()]
         
         # Randomly shuffle remaining players
-        remaining_players = [p for p in player_list if p not in pre_assigned]
-        random.shuffle(remaining_players)
+        self._rng.shuffle(remaining_players)
         
-        # Create assignments
-        assignments = []
+        # Create (lane, player) assignments
+        assignments: list[tuple[str, str]] = []
         
         # First add pre-assigned players
         for player, lane in pre_assigned.items():
-            assignments.append(f"{lane}: {player}")
+            assignments.append((lane, player))
         
         # Then add remaining players to random lanes
         for i, player in enumerate(remaining_players):
             if i < len(available_lanes):
-                assignments.append(f"{available_lanes[i]}: {player}")
+                assignments.append((available_lanes[i], player))
         
         # Create embed for better presentation
-        embed = discord.Embed(
-            title="League of Legends Team Assignment",
-            description="Here's your team composition!",
-            color=discord.Color.blue()
-        )
+        embed = discord.Embed(title=_TEAM_TITLE, description=_TEAM_DESC, color=_BLUE)
         
         # Add assignments to embed
-        for assignment in assignments:
-            embed.add_field(name=assignment.split(':')[0], value=assignment.split(':')[1], inline=True)
+        for lane, player in assignments:
+            embed.add_field(name=lane, value=player, inline=True)
         
         # Add footer with player count
         embed.set_footer(text=f"Total Players: {len(player_list)}")
@@ -123,7 +199,7 @@ class GameCommands(commands.Cog):
             players (str): Comma-separated list of players (2-5 players)
         """
         # Parse players and get pre-assigned lanes
-        player_list, pre_assigned = self.parse_players(players)
+        player_list, pre_assigned, remaining_players = self.parse_players(players)
         
         # Validate number of players
         if len(player_list) < 2:
@@ -133,100 +209,56 @@ class GameCommands(commands.Cog):
             await ctx.send("You can only have up to 5 players in a team!")
             return
         
-        # Define all possible lanes
-        lanes = ['Top', 'Jungle', 'Mid', 'Bot', 'Support']
-        
         # Remove pre-assigned lanes from available lanes
-        available_lanes = [lane for lane in lanes if lane not in pre_assigned.values()]
+        available_lanes = [lane for lane in _LANES if lane not in pre_assigned.values()]
         
         # Randomly shuffle remaining players
-        remaining_players = [p for p in player_list if p not in pre_assigned]
-        random.shuffle(remaining_players)
+        self._rng.shuffle(remaining_players)
         
-        # Fetch champion data from Data Dragon API
+        # Fetch champion data from Data Dragon API (cached between invocations)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(DATA_DRAGON_CHAMPION_URL) as response:
-                    if response.status != 200:
-                        await ctx.send("Failed to fetch champion data. Please try again later.")
-                        return
-                    
-                    champion_data = await response.json()
-                    champions = list(champion_data['data'].values())
-                    
-                    # Create assignments with champion suggestions
-                    assignments = []
-                    
-                    # First add pre-assigned players
-                    for player, lane in pre_assigned.items():
-                        # Filter champions based on lane
-                        if lane == 'Top':
-                            lane_champs = [c for c in champions if 'Fighter' in c['tags'] or 'Tank' in c['tags']]
-                        elif lane == 'Jungle':
-                            lane_champs = [c for c in champions if 'Fighter' in c['tags'] or 'Tank' in c['tags'] or 'Assassin' in c['tags']]
-                        elif lane == 'Mid':
-                            lane_champs = [c for c in champions if 'Mage' in c['tags'] or 'Assassin' in c['tags']]
-                        elif lane == 'Bot':
-                            lane_champs = [c for c in champions if 'Marksman' in c['tags']]
-                        else:  # Support
-                            lane_champs = [c for c in champions if 'Support' in c['tags'] or 'Tank' in c['tags'] or 'Mage' in c['tags']]
-                        
-                        # Get 3 random champions for the lane
-                        suggested_champs = random.sample(lane_champs, min(3, len(lane_champs)))
-                        assignments.append({
-                            'lane': lane,
-                            'player': player,
-                            'champions': [champ['name'] for champ in suggested_champs]
-                        })
-                    
-                    # Then add remaining players to random lanes
-                    for i, player in enumerate(remaining_players):
-                        if i < len(available_lanes):
-                            lane = available_lanes[i]
-                            # Filter champions based on lane
-                            if lane == 'Top':
-                                lane_champs = [c for c in champions if 'Fighter' in c['tags'] or 'Tank' in c['tags']]
-                            elif lane == 'Jungle':
-                                lane_champs = [c for c in champions if 'Fighter' in c['tags'] or 'Tank' in c['tags'] or 'Assassin' in c['tags']]
-                            elif lane == 'Mid':
-                                lane_champs = [c for c in champions if 'Mage' in c['tags'] or 'Assassin' in c['tags']]
-                            elif lane == 'Bot':
-                                lane_champs = [c for c in champions if 'Marksman' in c['tags']]
-                            else:  # Support
-                                lane_champs = [c for c in champions if 'Support' in c['tags'] or 'Tank' in c['tags'] or 'Mage' in c['tags']]
-                            
-                            # Get 3 random champions for the lane
-                            suggested_champs = random.sample(lane_champs, min(3, len(lane_champs)))
-                            assignments.append({
-                                'lane': lane,
-                                'player': player,
-                                'champions': [champ['name'] for champ in suggested_champs]
-                            })
-                    
-                    # Create embed for better presentation
-                    embed = discord.Embed(
-                        title="League of Legends Team Assignment",
-                        description="Here's your team composition with champion suggestions!",
-                        color=discord.Color.blue()
-                    )
-                    
-                    # Add assignments to embed
-                    for assignment in assignments:
-                        # Format champion suggestions
-                        champs_str = " | ".join(assignment['champions'])
-                        embed.add_field(
-                            name=f"{assignment['lane']}: {assignment['player']}", 
-                            value=f"Suggested champions: {champs_str}", 
-                            inline=False
-                        )
-                    
-                    # Add footer with player count
-                    embed.set_footer(text=f"Total Players: {len(player_list)}")
-                    
-                    await ctx.send(embed=embed)
-                    
+            champions = await self._get_champions()
+            if champions is None:
+                await ctx.send("Failed to fetch champion data. Please try again later.")
+                return
+            
+            # Create (lane, player, champions) assignments with champion suggestions
+            assignments: list[tuple[str, str, list[str]]] = []
+            
+            # First add pre-assigned players
+            for player, lane in pre_assigned.items():
+                # Get 3 random champions for the lane
+                lane_champs = champions[lane]
+                assignments.append((lane, player, self._rng.sample(lane_champs, min(3, len(lane_champs)))))
+            
+            # Then add remaining players to random lanes
+            for i, player in enumerate(remaining_players):
+                if i < len(available_lanes):
+                    lane = available_lanes[i]
+                    # Get 3 random champions for the lane
+                    lane_champs = champions[lane]
+                    assignments.append((lane, player, self._rng.sample(lane_champs, min(3, len(lane_champs)))))
+            
+            # Create embed for better presentation
+            embed = discord.Embed(title=_TEAM_TITLE, description=_ASSIGN_DESC, color=_BLUE)
+            
+            # Add assignments to embed
+            for lane, player, suggested_champs in assignments:
+                # Format champion suggestions
+                champs_str = " | ".join(suggested_champs)
+                embed.add_field(
+                    name=f"{lane}: {player}", 
+                    value=f"Suggested champions: {champs_str}", 
+                    inline=False
+                )
+            
+            # Add footer with player count
+            embed.set_footer(text=f"Total Players: {len(player_list)}")
+            
+            await ctx.send(embed=embed)
+            
         except Exception as e:
-            print(f"Error fetching champion data: {e}")
+            logger.error("Error fetching champion data: %s", e)
             await ctx.send("An error occurred while fetching champion data. Please try again later.")
 
 async def setup(bot):
@@ -2,15 +2,18 @@
 Music commands module for Discord bot.
 """
 import asyncio
-import validators
+from io import StringIO
 import discord
 from discord.ext import commands
 from typing import Optional
+from urllib.parse import urlsplit
 
 from src.music.player import get_player
-from src.music.queue import queue_manager
 from src.music.ytdl import YTDLSource
-from src.config import PLAYLIST_LIMIT, MAX_SEARCH_RESULTS
+from src.config import PLAYLIST_LIMIT, MAX_SEARCH_RESULTS, EXTRACT_TIMEOUT
+
+# Leave headroom below Discord's 2000 character message limit
+QUEUE_MESSAGE_BUDGET = 1900
 
 def setup_music_commands(bot: commands.Bot) -> None:
     """
@@ -19,17 +22,18 @@ def setup_music_commands(bot: commands.Bot) -> None:
     Args:
         bot (commands.Bot): The Discord bot instance
     """
-    # Get player instance
-    player = get_player(bot)
-    
     @bot.command(name='play', help='Play a song from URL or search')
+    @commands.guild_only()
     async def play_command(ctx, *, query):
         """Play a song from URL or search for it"""
+        player = get_player(bot, ctx.guild.id)
         await player.play_from_url_or_search(ctx, query)
     
     @bot.command(name='search', help='Search for a song (shows top 5 results)')
+    @commands.guild_only()
     async def search_command(ctx, *, query):
         """Search for a song and select from results"""
+        player = get_player(bot, ctx.guild.id)
         if not ctx.author.voice:
             await ctx.send(f"{ctx.author.name} is not connected to a voice channel")
             return
@@ -41,10 +45,9 @@ def setup_music_commands(bot: commands.Bot) -> None:
         async with ctx.typing():
             try:
                 # Get search results
-                entries, result_message = await YTDLSource.search_source(
-                    query, 
-                    loop=bot.loop, 
-                    max_results=MAX_SEARCH_RESULTS
+                entries, result_message = await asyncio.wait_for(
+                    YTDLSource.search_source(query, loop=bot.loop, max_results=MAX_SEARCH_RESULTS),
+                    timeout=EXTRACT_TIMEOUT
                 )
                 
                 if not entries:
@@ -55,44 +58,45 @@ def setup_music_commands(bot: commands.Bot) -> None:
                 await ctx.send(f"**Top {num_results} search results:**\n{result_message}\n"
                                f"Type the number of the song to play (1-{num_results}) or type 'queue' to add to queue:")
                 
+                valid_responses = frozenset(str(i) for i in range(1, num_results + 1)) | {'queue'}
+                
                 def check(msg):
                     return (msg.author == ctx.author and msg.channel == ctx.channel and 
-                            (msg.content.isdigit() and 1 <= int(msg.content) <= num_results) or 
-                            msg.content.lower() == 'queue')
+                            msg.content.lower() in valid_responses)
                 
                 try:
                     response = await bot.wait_for('message', check=check, timeout=30)
                     
                     if response.content.lower() == 'queue' or ctx.voice_client.is_playing():
                         # Add first result to queue
-                        queue_manager.add(entries[0]['title'], entries[0]['webpage_url'])
+                        player.enqueue(ctx, entries[0]['title'], entries[0]['webpage_url'])
                         await ctx.send(f'Song added to queue: {entries[0]["title"]}')
-                        
-                        if not player.is_playing:
-                            await player._play_next(ctx)
                     else:
                         # Play the selected song immediately
                         choice = int(response.content) - 1
                         url = entries[choice]['webpage_url']
                         
                         # Add to queue and play
-                        queue_manager.add(entries[choice]['title'], url)
+                        player.enqueue(ctx, entries[choice]['title'], url)
                         
                         if player.is_playing:
                             await ctx.send(f'Added to queue: {entries[choice]["title"]}')
-                        else:
-                            await player._play_next(ctx)
                 
                 except asyncio.TimeoutError:
                     await ctx.send("Song selection timed out. Please try again.")
                     
+            except asyncio.TimeoutError:
+                await ctx.send('Search timed out, please try again.')
             except Exception as e:
                 await ctx.send(f'An error occurred: {str(e)}')
     
     @bot.command(name='playlist', help=f'Play a YouTube playlist (first {PLAYLIST_LIMIT} songs)')
+    @commands.guild_only()
     async def playlist_command(ctx, url: str):
         """Play songs from a YouTube playlist"""
-        if not validators.url(url):
+        player = get_player(bot, ctx.guild.id)
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
             await ctx.send("Please provide a valid URL for the playlist.")
             return
             
@@ -102,135 +106,118 @@ def setup_music_commands(bot: commands.Bot) -> None:
             
         async with ctx.typing():
             try:
-                # Use PyTubeFix to extract playlist information
-                playlist_dict = await YTDLSource.get_playlist(url, loop=bot.loop, limit=PLAYLIST_LIMIT)
+                # Resolve the playlist with PyTubeFix, entries arrive as each video resolves
+                entries = YTDLSource.get_playlist_streaming(url, loop=bot.loop, limit=PLAYLIST_LIMIT)
                 
-                if not playlist_dict or 'entries' not in playlist_dict:
+                try:
+                    first = await entries.__anext__()
+                except StopAsyncIteration:
                     await ctx.send('This URL does not appear to be a playlist or could not be accessed.')
                     return
-                    
-                entries = playlist_dict['entries']
-                total_songs = len(entries)
-                
-                if total_songs == 0:
-                    await ctx.send('No songs found in this playlist.')
-                    return
-                    
-                await ctx.send(f"Found {total_songs} songs in the playlist. Adding them to the queue...")
-                
-                status_message = await ctx.send(f"Added 0 / {total_songs} songs")
                 
-                # Prepare all playlist items
-                songs_to_add = []
-                for index, entry in enumerate(entries, start=1):
-                    if 'title' in entry and 'url' in entry:
-                        songs_to_add.append((entry['title'], entry['url']))
-                    
-                    if index % 5 == 0 or index == total_songs:
-                        await status_message.edit(content=f"Added {index} / {total_songs} songs")
-                    
-                    # Small delay to prevent flooding
-                    await asyncio.sleep(0.1)
-                
-                # Add all songs to queue
-                queue_manager.add_list(songs_to_add)
-                await ctx.send('Playlist fully added to queue.')
-                
-                # Start playing if not already
-                if not player.is_playing:
-                    await player._play_next(ctx)
+                # Queue the first song right away unless an earlier playlist is still loading,
+                # the rest follows in the background
+                if player.queue_in_background(ctx, entries, first=first):
+                    await ctx.send(f"Added {first['title']} to the queue, loading the rest of the playlist...")
+                else:
+                    await ctx.send("Another playlist is still loading, this one will be queued after it...")
                     
+            except asyncio.TimeoutError:
+                await ctx.send('Playlist extraction timed out, please try again.')
             except Exception as e:
                 await ctx.send(f'An error occurred: {str(e)}')
     
     @bot.command(name='pause', help='Pause the current song')
+    @commands.guild_only()
     async def pause_command(ctx):
         """Pause the current song"""
+        player = get_player(bot, ctx.guild.id)
         await player.pause(ctx)
     
     @bot.command(name='resume', help='Resume the paused song')
+    @commands.guild_only()
     async def resume_command(ctx):
         """Resume the paused song"""
+        player = get_player(bot, ctx.guild.id)
         await player.resume(ctx)
     
     @bot.command(name='skip', help='Skip the current song')
+    @commands.guild_only()
     async def skip_command(ctx):
         """Skip the current song"""
+        player = get_player(bot, ctx.guild.id)
         await player.skip(ctx)
     
     @bot.command(name='tskip', help='Skip to a specific timestamp (format mm:ss or m:ss)')
+    @commands.guild_only()
     async def timestamp_skip_command(ctx, timestamp):
         """Skip to a specific timestamp in the current song"""
+        player = get_player(bot, ctx.guild.id)
         await player.timestamp_skip(ctx, timestamp)
     
     @bot.command(name='qlist', help='Display the current queue')
+    @commands.guild_only()
     async def queue_list_command(ctx):
         """Display the current queue"""
-        if queue_manager.is_empty:
+        player = get_player(bot, ctx.guild.id)
+        if not player.queue:
             await ctx.send('The queue is empty.')
             return
             
-        queue_items = queue_manager.queue
-        queue_list = []
-        
-        for index, item in enumerate(queue_items):
-            title, _ = item
-            queue_list.append(f'{index + 1}: {title}')
-        
         # Add currently playing song at the top if there is one
-        current = queue_manager.current
+        current = player.queue.current
         if current:
-            title, _ = current
-            queue_message = f'**Now Playing:** {title}\n\n**Up Next:**\n'
+            header = f'**Now Playing:** {current[0]}\n\n**Up Next:**\n'
         else:
-            queue_message = '**Queue:**\n'
-            
-        queue_message += '\n'.join(queue_list)
+            header = '**Queue:**\n'
         
-        # Split message if too long
-        if len(queue_message) > 2000:
-            parts = []
-            current_part = queue_message[:2000]
-            last_newline = current_part.rfind('\n')
-            parts.append(current_part[:last_newline])
-            
-            remaining = queue_message[last_newline+1:]
-            await ctx.send(parts[0])
-            # Count how many lines are left without using '\n' in f-string
-            remaining_lines = remaining.count('\n') + 1
-            await ctx.send(f"...and {remaining_lines} more songs")
-        else:
-            await ctx.send(queue_message)
+        # Stream lines into one buffer and stop once the message size budget is reached
+        buf = StringIO()
+        buf.write(header)
+        for index, item in enumerate(player.queue, start=1):
+            line = f'{index}: {item[0]}\n'
+            if buf.tell() + len(line) > QUEUE_MESSAGE_BUDGET:
+                buf.write(f"...and {len(player.queue) - index + 1} more songs")
+                break
+            buf.write(line)
+        
+        await ctx.send(buf.getvalue())
     
     @bot.command(name='qskip', help='Skip to a specific song in the queue')
+    @commands.guild_only()
     async def queue_skip_command(ctx, index: int):
         """Skip to a specific song in the queue"""
-        if queue_manager.is_empty:
+        player = get_player(bot, ctx.guild.id)
+        if not player.queue:
             await ctx.send('The queue is empty.')
             return
         
-        if index < 1 or index > queue_manager.length:
+        if index < 1 or index > len(player.queue):
             await ctx.send('Invalid song index. Please enter a number within the range of the queue.')
             return
         
         # Skip to the specified position
-        queue_manager.skip_to(index)
+        player.queue.skip_to(index)
         
         # Stop current playback to trigger next song
         if ctx.voice_client and ctx.voice_client.is_playing():
             ctx.voice_client.stop()
             await ctx.send(f'Skipped to song {index} in the queue.')
         else:
-            await player._play_next(ctx)
+            player.start_playback(ctx)
     
     @bot.command(name='qclear', help='Clear the entire queue')
+    @commands.guild_only()
     async def clear_queue_command(ctx):
         """Clear the entire queue"""
-        if queue_manager.is_empty:
+        player = get_player(bot, ctx.guild.id)
+        if not player.queue:
             await ctx.send('The queue is already empty.')
             return
             
-        queue_manager.clear()
+        player.queue.clear()
+        player.cancel_prefetch()
+        player.cancel_background_loading()
         
         if ctx.voice_client and ctx.voice_client.is_playing():
             ctx.voice_client.stop()
@@ -238,23 +225,29 @@ def setup_music_commands(bot: commands.Bot) -> None:
         await ctx.send('Queue cleared.')
     
     @bot.command(name='shuffle', help='Shuffle the remaining songs in the queue')
+    @commands.guild_only()
     async def shuffle_command(ctx):
         """Shuffle the remaining songs in the queue"""
-        if queue_manager.length < 2:
+        player = get_player(bot, ctx.guild.id)
+        if len(player.queue) < 2:
             await ctx.send('Not enough songs in the queue to shuffle.')
             return
         
-        queue_manager.shuffle()
+        player.queue.shuffle()
         await ctx.send('Queue shuffled successfully.')
     
     @bot.command(name='leave', help='Make the bot leave the voice channel')
+    @commands.guild_only()
     async def leave_command(ctx):
         """Make the bot leave the voice channel"""
+        player = get_player(bot, ctx.guild.id)
         await player.leave(ctx)
     
     @bot.command(name='reconnect', help='Reconnect to voice channel if connection is lost')
+    @commands.guild_only()
     async def reconnect_command(ctx):
         """Reconnect to voice channel"""
+        player = get_player(bot, ctx.guild.id)
         if not ctx.author.voice:
             await ctx.send(f"{ctx.author.name} is not connected to a voice channel")
             return
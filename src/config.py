@@ -2,6 +2,7 @@
 Configuration module for the Discord music bot.
 """
 import os
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -12,17 +13,52 @@ COMMAND_PREFIX = os.getenv('COMMAND_PREFIX', '!')
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 
 
+# Playback volume, applied by FFmpeg's volume filter while it encodes to Opus.
+# Set it to 1.0 to skip the filter and pass Opus streams through without re-encoding
+PLAYBACK_VOLUME = float(os.getenv('PLAYBACK_VOLUME', 0.5))
+
 # FFmpeg configuration - optimized for better streaming performance
-FFMPEG_OPTIONS = {
-    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -probesize 200M -analyzeduration 0 -nostdin',
-    'options': '-vn -bufsize 512k'
-}
+# Read-only so per-song overrides must build a new dict instead of mutating the shared one
+FFMPEG_OPTIONS = MappingProxyType({
+    'before_options': (
+        '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 '
+        '-reconnect_on_network_error 1 -reconnect_on_http_error 5xx '
+        '-thread_queue_size 512 -probesize 200M -analyzeduration 0 -nostdin'
+    ),
+    'options': '-vn -bufsize 512k' + (f' -af volume={PLAYBACK_VOLUME}' if PLAYBACK_VOLUME != 1.0 else '')
+})
 
 # Search configuration
 MAX_SEARCH_RESULTS = 5
 PLAYLIST_LIMIT = 30
 
+# Playback configuration
+MAX_CONSECUTIVE_FAILURES = 5  # Songs that may fail in a row before the queue is cleared
+IDLE_DISCONNECT_TIMEOUT = 120  # Seconds without playback before leaving the voice channel
+
+# Worker threads for blocking PyTubeFix calls (kept separate from the default executor).
+# The work is network-bound, so the pool scales well past the CPU count
+YTDL_MAX_WORKERS = int(os.getenv('YTDL_THREAD_POOL', (os.cpu_count() or 1) * 5))
+
+# Worker processes for stream resolution (PyTubeFix signature deciphering is CPU-bound Python).
+# Each worker costs a full interpreter's memory; set to 0 to resolve streams on the thread pool
+YTDL_PROCESS_WORKERS = int(os.getenv('YTDL_PROCESS_WORKERS', 2))
+
+# Stream resolutions allowed in flight at once, so bursts don't starve other commands of workers
+EXTRACT_CONCURRENCY = 8
+
+# Seconds to wait for metadata extraction before giving up
+EXTRACT_TIMEOUT = 15
+PLAYLIST_EXTRACT_TIMEOUT = 30
+
+# Metadata cache configuration
+EXTRACT_CACHE_SIZE = 512
+EXTRACT_CACHE_TTL = 60 * 60  # Seconds a title/URL lookup stays cached
+STREAM_CACHE_TTL = 4 * 60 * 60  # Resolved stream URLs expire after ~6 hours on YouTube's side
+SEARCH_CACHE_TTL = 10 * 60  # Search rankings drift, so results are kept briefly
+
 # Data Dragon API configuration
 DATA_DRAGON_BASE_URL = "https://ddragon.leagueoflegends.com"
 DATA_DRAGON_VERSION = "15.6.1"  # Latest version as of now
-DATA_DRAGON_CHAMPION_URL = f"{DATA_DRAGON_BASE_URL}/cdn/{DATA_DRAGON_VERSION}/data/en_US/champion.json" 
\ No newline at end of file
+DATA_DRAGON_CHAMPION_URL = f"{DATA_DRAGON_BASE_URL}/cdn/{DATA_DRAGON_VERSION}/data/en_US/champion.json"
+CHAMPION_CACHE_TTL = 6 * 60 * 60  # Champion data only changes on patch days 
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Small in-memory TTL cache for the music modules.
+"""
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """
+    Size-bounded mapping whose entries expire after a fixed time-to-live.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept before the oldest is evicted
+            ttl (float): Seconds an entry stays valid after being stored
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Optional[Any]: The cached value, or None if missing or expired
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the oldest entry if the cache is full
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+        """
+        self._data.pop(key, None)
+        if len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + self.ttl, value)
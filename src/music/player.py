@@ -2,30 +2,57 @@
 Music player module for Discord music bot.
 """
 import asyncio
+import logging
 import discord
 from discord.ext import commands
-from typing import Optional, Callable
+from typing import AsyncIterator, Dict, Optional, Callable, Set, Tuple
 
-from src.music.queue import queue_manager
+from src.config import (EXTRACT_CACHE_SIZE, EXTRACT_CACHE_TTL, EXTRACT_TIMEOUT, IDLE_DISCONNECT_TIMEOUT,
+                        MAX_CONSECUTIVE_FAILURES)
+from src.music.cache import TTLCache
+from src.music.queue import MusicQueue
 from src.music.ytdl import YTDLSource
 
+logger = logging.getLogger(__name__)
+
+# (title, webpage_url) lookups keyed by URL or search query
+_extract_cache = TTLCache(maxsize=EXTRACT_CACHE_SIZE, ttl=EXTRACT_CACHE_TTL)
+
+# Queries starting with one of these are treated as URLs rather than searches
+_URL_PREFIXES: Tuple[str, ...] = ('http://', 'https://')
+
 class MusicPlayer:
     """
     Handles music playback functionality for the bot.
     """
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: commands.Bot, guild_id: int):
         """
         Initialize the music player.
         
         Args:
             bot (commands.Bot): The Discord bot instance
+            guild_id (int): ID of the guild this player belongs to
         """
         self.bot = bot
+        self.guild_id = guild_id
+        self.queue = MusicQueue()
         self._current_ctx: Optional[commands.Context] = None
-        self.is_playing = False
         self.current = None
         self.voice_client = None
-        self.disconnect_timer = None
+        self._activity = asyncio.Event()
+        self._idle_task: Optional[asyncio.Task] = None
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._prefetch_url: Optional[str] = None
+        self._player_task: Optional[asyncio.Task] = None
+        self._song_done = asyncio.Event()
+        self._playlist_tasks: Set[asyncio.Task] = set()
+        self._last_playlist_task: Optional[asyncio.Task] = None
+        self._failed_plays = 0
+    
+    @property
+    def is_playing(self) -> bool:
+        """Check if the bot is currently playing audio"""
+        return bool(self.voice_client and self.voice_client.is_playing())
     
     @property
     def is_paused(self) -> bool:
@@ -99,13 +126,52 @@ class MusicPlayer:
         async with ctx.typing():
             try:
                 # Check if query is a URL
-                if query.startswith(('http://', 'https://')):
+                if query.startswith(_URL_PREFIXES):
                     await self._handle_url(ctx, query)
                 else:
                     await self._handle_search(ctx, query)
             except Exception as e:
                 await ctx.send(f"An error occurred: {str(e)}")
     
+    async def _extract_info(self, query: str, search: bool = False,
+                            resolve_stream: bool = False) -> Optional[Tuple[str, str]]:
+        """
+        Look up the title and page URL for a URL or search query, using the cache when possible.
+        
+        Args:
+            query (str): URL or search query
+            search (bool): Whether query is a search query rather than a URL
+            resolve_stream (bool): Resolve the full stream data of a URL (seeding the stream cache)
+                instead of only its title, for songs that are about to play
+            
+        Returns:
+            Optional[Tuple[str, str]]: (title, webpage_url) of the first match, or None if nothing was found
+            
+        Raises:
+            asyncio.TimeoutError: If the lookup takes longer than EXTRACT_TIMEOUT
+        """
+        cache_key = (search, query)
+        cached = _extract_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if search:
+            info = await asyncio.wait_for(YTDLSource.first_search(query, loop=self.bot.loop), timeout=EXTRACT_TIMEOUT)
+        elif resolve_stream:
+            # The song plays next: resolving it fully now lets from_url reuse the cached data
+            # instead of fetching the same video a second time moments later
+            data = await asyncio.wait_for(YTDLSource.fetch_data(query, loop=self.bot.loop), timeout=EXTRACT_TIMEOUT)
+            info = (data['title'], data['webpage_url'])
+        else:
+            # Only the title is needed here; streams are resolved when the song starts playing
+            info = await asyncio.wait_for(YTDLSource.resolve_title(query, loop=self.bot.loop), timeout=EXTRACT_TIMEOUT)
+        
+        if not info:
+            return None
+        
+        _extract_cache.set(cache_key, info)
+        return info
+    
     async def _handle_url(self, ctx: commands.Context, url: str) -> None:
         """
         Handle playback from a direct URL.
@@ -115,26 +181,14 @@ class MusicPlayer:
             url (str): URL to play
         """
         try:
-            # Extract info to get the title
-            def extract_info():
-                return YTDLSource.ytdl.extract_info(url, download=False)
-            info = await self.bot.loop.run_in_executor(None, extract_info)
+            # Extract info to get the title (fully resolved if it is going to play right away)
+            title, url = await self._extract_info(url, resolve_stream=not self.is_playing)
             
-            if 'entries' in info:
-                # It's a playlist or single video in a playlist format
-                title = info['entries'][0]['title']
-                url = info['entries'][0]['webpage_url']
-            else:
-                title = info['title']
-                
-            # Add to queue
-            queue_manager.add(title, url)
+            self.enqueue(ctx, title, url)
             await ctx.send(f'Added to queue: {title}')
-            
-            # If nothing is playing, start playback
-            if not self.is_playing:
-                await self._play_next(ctx)
                 
+        except asyncio.TimeoutError:
+            await ctx.send('Extraction timed out, please try again.')
         except Exception as e:
             await ctx.send(f'An error occurred: {str(e)}')
     
@@ -147,112 +201,271 @@ class MusicPlayer:
             query (str): Search query
         """
         try:
-            # Format query for YouTube search
-            search_query = f"ytsearch1:{query}"
-            def extract_search_info():
-                return YTDLSource.ytdl.extract_info(search_query, download=False)
-            info = await self.bot.loop.run_in_executor(None, extract_search_info)
+            info = await self._extract_info(query, search=True)
             
-            if 'entries' in info and info['entries']:
-                entry = info['entries'][0]
-                title = entry['title']
-                url = entry['webpage_url']
+            if info:
+                title, url = info
                 
-                # Add to queue
-                queue_manager.add(title, url)
+                self.enqueue(ctx, title, url)
                 await ctx.send(f'Added to queue: {title}')
-                
-                # If nothing is playing, start playback
-                if not self.is_playing:
-                    await self._play_next(ctx)
             else:
                 await ctx.send("No search results found.")
                 
+        except asyncio.TimeoutError:
+            await ctx.send('Extraction timed out, please try again.')
         except Exception as e:
             await ctx.send(f'An error occurred: {str(e)}')
     
-    async def _play_next(self, ctx: commands.Context) -> None:
+    def enqueue(self, ctx: commands.Context, title: str, url: str) -> None:
+        """
+        Add a song to the queue and make sure the playback loop picks it up.
+        
+        A song that lands at the head of the queue while another one plays is up next,
+        so its stream is resolved right away instead of when it starts.
+        
+        Args:
+            ctx (commands.Context): Command context
+            title (str): Song title
+            url (str): Song URL
+        """
+        self.queue.add(title, url)
+        if self.is_playing and len(self.queue) == 1:
+            self._schedule_prefetch()
+        self.start_playback(ctx)
+    
+    def start_playback(self, ctx: commands.Context) -> None:
         """
-        Play the next song in the queue.
+        Start the playback loop if it isn't already running.
         
         Args:
             ctx (commands.Context): Command context
         """
-        if self.disconnect_timer:
-            self.disconnect_timer.cancel()
-            self.disconnect_timer = None
-            
-        if queue_manager.is_empty:
-            self.is_playing = False
-            self.current = None
+        if self._player_task is None or self._player_task.done():
+            self._player_task = asyncio.create_task(self._player_loop(ctx))
+    
+    def stop_playback(self) -> None:
+        """Stop the playback loop."""
+        if self._player_task and not self._player_task.done():
+            self._player_task.cancel()
+        self._player_task = None
+    
+    async def _player_loop(self, ctx: commands.Context) -> None:
+        """
+        Play queued songs one after another, waiting for new songs once the queue runs dry.
+        
+        Args:
+            ctx (commands.Context): Command context
+        """
+        while True:
+            if not self.queue:
+                self.current = None
             
-            # Start disconnect timer
-            self.disconnect_timer = asyncio.create_task(self._disconnect_after_delay(ctx))
-            return
+            # Every song transition restarts the idle countdown
+            self._activity.set()
+            if self._idle_task is None or self._idle_task.done():
+                self._idle_task = asyncio.create_task(self._idle_watchdog(ctx))
             
-        self.is_playing = True
-        self.current = await queue_manager.get_next()
-        
-        try:
-            # Check if next_item includes a timestamp (tuple of 3 elements)
-            if len(self.current) == 3:
-                title, url, timestamp = self.current
-                player = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True, timestamp=timestamp)
-            else:
-                title, url = self.current
-                player = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True)
+            self.current = await self.queue.get_next()
+            self._activity.set()
             
             # Check if voice client is still connected
             if not self.voice_client or not self.voice_client.is_connected():
                 await ctx.send("Voice connection lost. Please try rejoining the voice channel.")
-                self.is_playing = False
                 return
             
+            if await self._play(ctx, self.current):
+                await self._song_done.wait()
+    
+    async def _play(self, ctx: commands.Context, item: Tuple) -> bool:
+        """
+        Start playing a queue item.
+        
+        Args:
+            ctx (commands.Context): Command context
+            item (Tuple): (title, url) or (title, url, timestamp) queue item
+            
+        Returns:
+            bool: True if playback started, False if the song failed to load
+        """
+        title, url = item[0], item[1]
+        try:
+            # Let a prefetch of this song finish instead of resolving it a second time
+            if url == self._prefetch_url and self._prefetch_task and not self._prefetch_task.done():
+                await asyncio.wait((self._prefetch_task,), timeout=EXTRACT_TIMEOUT)
+            
+            # Check if next_item includes a timestamp (tuple of 3 elements)
+            # (from_url reuses stream data prefetched while the previous song was playing)
+            if len(item) == 3:
+                source = YTDLSource.from_url(url, loop=self.bot.loop, stream=True, timestamp=item[2])
+            else:
+                source = YTDLSource.from_url(url, loop=self.bot.loop, stream=True)
+            # A hung resolution would otherwise stall this guild's player loop indefinitely
+            player = await asyncio.wait_for(source, timeout=EXTRACT_TIMEOUT)
+            
             # Define callback for when song ends
             def after_play(error):
                 if error:
                     # Log the error for debugging but don't spam the chat
-                    print(f"Playback error: {error}")
+                    logger.error("Playback error: %s", error)
                     # Only send message for non-connection errors
                     if "Connection" not in str(error) and "WebSocket" not in str(error):
                         asyncio.run_coroutine_threadsafe(
                             ctx.send(f'An error occurred: {error}'),
                             self.bot.loop
                         )
-                asyncio.run_coroutine_threadsafe(self._play_next(ctx), self.bot.loop)
+                self.bot.loop.call_soon_threadsafe(self._song_done.set)
             
+            self._song_done.clear()
             self.voice_client.play(player, after=after_play)
             await ctx.send(f'Now playing: {player.title}')
+            self._failed_plays = 0
+            
+            # Resolve the next song while this one plays to avoid a gap between songs
+            self._schedule_prefetch()
+            return True
             
         except Exception as e:
-            await ctx.send(f'An error occurred while playing ({title}): {str(e)}')
-            await self._play_next(ctx)
+            if isinstance(e, asyncio.TimeoutError):
+                await ctx.send(f'Loading {title} timed out, skipping it.')
+            else:
+                await ctx.send(f'An error occurred while playing ({title}): {str(e)}')
+            
+            # Give up on a queue full of broken songs instead of retrying forever
+            self._failed_plays += 1
+            if self._failed_plays >= MAX_CONSECUTIVE_FAILURES:
+                self._failed_plays = 0
+                self.queue.clear()
+                self.cancel_prefetch()
+                self.cancel_background_loading()
+                await ctx.send(f"{MAX_CONSECUTIVE_FAILURES} songs in a row failed to play, clearing the queue.")
+            return False
+    
+    def _schedule_prefetch(self) -> None:
+        """Start resolving the stream data of the song at the head of the queue."""
+        if not self.queue:
+            return
+        
+        next_url = self.queue[0][1]
+        if next_url == self._prefetch_url and self._prefetch_task and not self._prefetch_task.done():
+            return  # Already being resolved
+        
+        self.cancel_prefetch()
+        self._prefetch_url = next_url
+        self._prefetch_task = asyncio.create_task(self._prefetch(next_url))
     
-    async def _disconnect_after_delay(self, ctx: commands.Context) -> None:
+    async def _prefetch(self, url: str) -> None:
         """
-        Disconnect from voice channel after 2 minutes if no new songs are added.
+        Resolve the stream data for a song so it is already cached when the song starts.
         
         Args:
-            ctx (commands.Context): Command context
+            url (str): URL of the song to resolve
         """
         try:
-            await asyncio.sleep(120)  # Wait for 2 minutes
+            await YTDLSource.fetch_data(url, loop=self.bot.loop)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Not fatal, the song will be resolved again when it starts
+            logger.warning("Prefetch failed for %s: %s", url, e)
+    
+    def cancel_prefetch(self) -> None:
+        """Cancel any pending prefetch."""
+        if self._prefetch_task and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+        self._prefetch_task = None
+        self._prefetch_url = None
+    
+    def queue_in_background(self, ctx: commands.Context, entries: AsyncIterator[dict],
+                            first: Optional[dict] = None) -> bool:
+        """
+        Queue playlist entries as they resolve, without blocking the calling command.
+        
+        Args:
+            ctx (commands.Context): Command context
+            entries (AsyncIterator[dict]): Playlist entries, e.g. from YTDLSource.get_playlist_streaming
+            first (Optional[dict]): Already resolved first entry, queued right away unless an
+                earlier playlist is still loading, in which case it waits its turn with the rest
             
-            # Check if queue is still empty and we're not playing anything
-            if queue_manager.is_empty and not self.is_playing:
-                if self.voice_client and self.voice_client.is_connected():
-                    try:
-                        await self.voice_client.disconnect(force=True)
-                        self.voice_client = None
-                        await ctx.send("Disconnected due to inactivity.")
-                    except Exception as e:
-                        # If disconnect fails, just clean up our references
-                        self.voice_client = None
-                        print(f"Error during auto-disconnect: {e}")
-                    
+        Returns:
+            bool: True if first was added to the queue right away
+        """
+        after = self._last_playlist_task
+        if after is not None and after.done():
+            after = None
+        
+        queued_first = first is not None and after is None
+        if queued_first:
+            self.enqueue(ctx, first['title'], first['url'])
+            first = None
+        
+        task = asyncio.create_task(self._queue_entries(ctx, entries, after=after, first=first))
+        self._playlist_tasks.add(task)
+        task.add_done_callback(self._playlist_tasks.discard)
+        self._last_playlist_task = task
+        return queued_first
+    
+    async def _queue_entries(self, ctx: commands.Context, entries: AsyncIterator[dict],
+                             after: Optional[asyncio.Task] = None, first: Optional[dict] = None) -> None:
+        """
+        Add entries to the queue as they arrive.
+        
+        Args:
+            ctx (commands.Context): Command context
+            entries (AsyncIterator[dict]): Playlist entries
+            after (Optional[asyncio.Task]): Loading task of an earlier playlist to let finish first,
+                so playlists are queued whole and in the order they were requested
+            first (Optional[dict]): Already resolved first entry to queue ahead of entries
+        """
+        added = 0
+        try:
+            if after is not None:
+                await asyncio.wait((after,))
+            if first is not None:
+                self.enqueue(ctx, first['title'], first['url'])
+            async for entry in entries:
+                # Restarts playback if it ran out while this entry was resolving
+                self.enqueue(ctx, entry['title'], entry['url'])
+                added += 1
+            await ctx.send(f"Finished loading the playlist ({added} more songs queued).")
         except asyncio.CancelledError:
-            # Timer was cancelled, do nothing
-            pass
+            raise
+        except Exception as e:
+            await ctx.send(f"Stopped loading the playlist after {added} songs: {e}")
+    
+    def cancel_background_loading(self) -> None:
+        """Stop queueing every playlist that is still loading."""
+        for task in self._playlist_tasks:
+            task.cancel()
+        self._playlist_tasks.clear()
+        self._last_playlist_task = None
+    
+    async def _idle_watchdog(self, ctx: commands.Context) -> None:
+        """
+        Disconnect once nothing has played for IDLE_DISCONNECT_TIMEOUT seconds.
+        
+        Runs for as long as the bot stays connected; song transitions signal
+        activity instead of cancelling and recreating a timer.
+        
+        Args:
+            ctx (commands.Context): Command context
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._activity.wait(), timeout=IDLE_DISCONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Check if queue is still empty and we're not playing anything
+                if not self.queue and not self.is_playing and not self.is_paused:
+                    if self.voice_client and self.voice_client.is_connected():
+                        try:
+                            await self.voice_client.disconnect(force=True)
+                            self.voice_client = None
+                            await ctx.send("Disconnected due to inactivity.")
+                        except Exception as e:
+                            # If disconnect fails, just clean up our references
+                            self.voice_client = None
+                            logger.warning("Error during auto-disconnect: %s", e)
+                    return
+            self._activity.clear()
     
     async def pause(self, ctx: commands.Context) -> None:
         """
@@ -324,7 +537,7 @@ class MusicPlayer:
             
             # Add the timestamped version of the current song to the front of the queue
             # We need to do this before removing the current song from the queue
-            queue_manager.add_to_front(f"{title} (from {timestamp})", url, timestamp=total_seconds)
+            self.queue.add_to_front(f"{title} (from {timestamp})", url, timestamp=total_seconds)
             
             # Now skip the current song - this will trigger the normal after_play callback
             # which will play the next song in the queue (our timestamped version)
@@ -347,33 +560,36 @@ class MusicPlayer:
                 if voice_client.is_playing():
                     voice_client.stop()
                 await voice_client.disconnect(force=True)
-                queue_manager.clear()
-                self.is_playing = False
+                self.stop_playback()
+                self.queue.clear()
+                self.cancel_prefetch()
+                self.cancel_background_loading()
                 self.current = None
                 self.voice_client = None
-                if self.disconnect_timer:
-                    self.disconnect_timer.cancel()
-                    self.disconnect_timer = None
+                if self._idle_task:
+                    self._idle_task.cancel()
+                    self._idle_task = None
                 await ctx.send("The bot has left the voice channel.")
             except Exception as e:
                 await ctx.send(f"Error while leaving voice channel: {e}")
         else:
             await ctx.send("The bot is not connected to a voice channel.")
 
-# Singleton instance
-player = None
+# Music players keyed by guild ID
+players: Dict[int, MusicPlayer] = {}
 
-def get_player(bot: commands.Bot) -> MusicPlayer:
+def get_player(bot: commands.Bot, guild_id: int) -> MusicPlayer:
     """
-    Get the music player singleton instance.
+    Get the music player for a guild, creating it on first use.
     
     Args:
         bot (commands.Bot): The Discord bot instance
+        guild_id (int): ID of the guild
         
     Returns:
-        MusicPlayer: The music player instance
+        MusicPlayer: The guild's music player instance
     """
-    global player
+    player = players.get(guild_id)
     if player is None:
-        player = MusicPlayer(bot)
-    return player 
\ No newline at end of file
+        player = players[guild_id] = MusicPlayer(bot, guild_id)
+    return player
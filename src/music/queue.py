@@ -3,7 +3,8 @@ Queue management module for Discord music bot.
 """
 import asyncio
 import random
-from typing import List, Tuple, Optional, Callable, Any
+from collections import deque
+from typing import Deque, Iterator, List, Tuple, Optional, Callable, Any
 
 class MusicQueue:
     """
@@ -11,8 +12,9 @@ class MusicQueue:
     """
     def __init__(self):
         """Initialize an empty music queue"""
-        self._queue: List[Tuple[str, str]] = []  # List of (title, url) tuples
+        self._queue: Deque[Tuple[str, str]] = deque()  # Deque of (title, url) tuples
         self._current_item: Optional[Tuple[str, str]] = None
+        self._not_empty = asyncio.Event()  # Set while the queue holds items
     
     @property
     def current(self) -> Optional[Tuple[str, str]]:
@@ -20,20 +22,26 @@ class MusicQueue:
         return self._current_item
     
     @property
-    def queue(self) -> List[Tuple[str, str]]:
-        """Returns a copy of the queue"""
-        return self._queue.copy()
+    def queue(self) -> Tuple[Tuple[str, str], ...]:
+        """Returns an immutable snapshot of the queue"""
+        return tuple(self._queue)
     
-    @property
-    def is_empty(self) -> bool:
-        """Check if the queue is empty"""
-        return len(self._queue) == 0
-    
-    @property
-    def length(self) -> int:
+    def __len__(self) -> int:
         """Returns the number of items in the queue"""
         return len(self._queue)
     
+    def __bool__(self) -> bool:
+        """Returns True if there are items in the queue"""
+        return bool(self._queue)
+    
+    def __getitem__(self, index: int) -> Tuple[str, str]:
+        """Returns the item at the given index (0-based) without copying the queue"""
+        return self._queue[index]
+    
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Iterates over the queued items without copying the queue"""
+        return iter(self._queue)
+    
     def add(self, title: str, url: str) -> None:
         """
         Add an item to the queue
@@ -43,6 +51,7 @@ class MusicQueue:
             url (str): Song URL
         """
         self._queue.append((title, url))
+        self._not_empty.set()
     
     def add_to_front(self, title: str, url: str, timestamp: Optional[int] = None) -> None:
         """
@@ -55,9 +64,10 @@ class MusicQueue:
         """
         # We store the timestamp as a third element in the tuple for the from_url method to use
         if timestamp is not None:
-            self._queue.insert(0, (title, url, timestamp))
+            self._queue.appendleft((title, url, timestamp))
         else:
-            self._queue.insert(0, (title, url))
+            self._queue.appendleft((title, url))
+        self._not_empty.set()
     
     def add_list(self, items: List[Tuple[str, str]]) -> None:
         """
@@ -67,16 +77,21 @@ class MusicQueue:
             items (List[Tuple[str, str]]): List of (title, url) tuples to add
         """
         self._queue.extend(items)
+        self._sync_not_empty()
     
     def clear(self) -> None:
         """Clear the queue"""
-        self._queue = []
+        self._queue.clear()
         self._current_item = None
+        self._not_empty.clear()
     
     def shuffle(self) -> None:
         """Shuffle the queue"""
         if len(self._queue) > 1:
-            random.shuffle(self._queue)
+            # Shuffle a list copy, deque indexing is O(n) away from the ends
+            items = list(self._queue)
+            random.shuffle(items)
+            self._queue = deque(items)
     
     def remove(self, index: int) -> Optional[Tuple[str, str]]:
         """
@@ -89,7 +104,10 @@ class MusicQueue:
             Optional[Tuple[str, str]]: The removed item, or None if index is invalid
         """
         if 0 <= index < len(self._queue):
-            return self._queue.pop(index)
+            item = self._queue[index]
+            del self._queue[index]
+            self._sync_not_empty()
+            return item
         return None
     
     def skip_to(self, index: int) -> None:
@@ -101,31 +119,36 @@ class MusicQueue:
         """
         if 1 <= index <= len(self._queue):
             # Remove everything before the target index
-            del self._queue[:index - 1]
+            for _ in range(index - 1):
+                self._queue.popleft()
+    
+    def _sync_not_empty(self) -> None:
+        """Update the not-empty event after items were removed or bulk-added"""
+        if self._queue:
+            self._not_empty.set()
+        else:
+            self._not_empty.clear()
     
-    async def get_next(self) -> Optional[Tuple[str, str]]:
+    async def get_next(self) -> Tuple[str, str]:
         """
-        Get the next item from the queue
+        Get the next item from the queue, waiting until one is available
         
         Returns:
-            Optional[Tuple[str, str]]: The next item in the queue, or None if empty
+            Tuple[str, str]: The next item in the queue
         """
-        if self._queue:
-            next_item = self._queue.pop(0)
-            # Check if it's a timestamped item (has 3 elements)
-            if len(next_item) == 3:
-                title, url, timestamp = next_item
-                # Store just title and URL as the current item
-                self._current_item = (title, url)
-                # But return all three elements for processing
-                return (title, url, timestamp)
-            else:
-                # Standard item, store and return as usual
-                self._current_item = next_item
-                return next_item
+        while not self._queue:
+            await self._not_empty.wait()
         
-        self._current_item = None
-        return None
-
-# Singleton instance
-queue_manager = MusicQueue() 
\ No newline at end of file
+        next_item = self._queue.popleft()
+        self._sync_not_empty()
+        # Check if it's a timestamped item (has 3 elements)
+        if len(next_item) == 3:
+            title, url, timestamp = next_item
+            # Store just title and URL as the current item
+            self._current_item = (title, url)
+            # But return all three elements for processing
+            return (title, url, timestamp)
+        else:
+            # Standard item, store and return as usual
+            self._current_item = next_item
+            return next_item
@@ -2,19 +2,149 @@
 YouTube downloader module for the Discord music bot using PyTubeFix.
 """
 import asyncio
+import atexit
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import MappingProxyType
+from typing import Optional
 import discord
 from pytubefix import YouTube, Search, Playlist
-from pytubefix.exceptions import VideoUnavailable, RegexMatchError, PytubeFixError
-from src.config import FFMPEG_OPTIONS
+from pytubefix.exceptions import (
+    AgeRestrictedError, LoginRequired, VideoUnavailable, RegexMatchError, PytubeFixError
+)
+from src.config import (
+    FFMPEG_OPTIONS, PLAYBACK_VOLUME, EXTRACT_CACHE_SIZE, EXTRACT_CACHE_TTL, STREAM_CACHE_TTL,
+    SEARCH_CACHE_TTL, YTDL_MAX_WORKERS, YTDL_PROCESS_WORKERS, EXTRACT_CONCURRENCY, EXTRACT_TIMEOUT,
+    PLAYLIST_EXTRACT_TIMEOUT
+)
+from src.music.cache import TTLCache
 
+logger = logging.getLogger(__name__)
 
-class YTDLSource(discord.PCMVolumeTransformer):
+# Drop PyTubeFix debug/info records at the level check, even if the root logger is verbose
+logging.getLogger('pytubefix').setLevel(logging.WARNING)
+
+# Dedicated pool for blocking PyTubeFix lookups, so concurrent extractions don't queue
+# behind (or delay) other work on the event loop's default executor
+ytdl_executor = ThreadPoolExecutor(max_workers=YTDL_MAX_WORKERS, thread_name_prefix='ytdl')
+atexit.register(ytdl_executor.shutdown)
+
+# Process pool for stream resolution, created on first use so importing this module never spawns workers
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+# Bounds concurrent stream resolutions, created on first use so it binds to the bot's running loop
+_extract_semaphore: Optional[asyncio.Semaphore] = None
+
+# Resolved stream data keyed by video URL
+_stream_cache = TTLCache(maxsize=EXTRACT_CACHE_SIZE, ttl=STREAM_CACHE_TTL)
+
+# Search hits as (title, watch_url, length_text) tuples keyed by (query, max_results)
+_search_cache = TTLCache(maxsize=EXTRACT_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+
+# Fully resolved playlist entries keyed by (url, limit)
+_playlist_cache = TTLCache(maxsize=EXTRACT_CACHE_SIZE, ttl=EXTRACT_CACHE_TTL)
+
+
+@functools.lru_cache(maxsize=128)
+def _seek_ffmpeg_options(timestamp):
+    """Build (once per timestamp) read-only FFmpeg options that start playback at timestamp seconds"""
+    current_before = FFMPEG_OPTIONS.get('before_options', '')
+    return MappingProxyType({**FFMPEG_OPTIONS, 'before_options': f"{current_before} -ss {timestamp}".strip()})
+
+
+class PermanentExtractionError(Exception):
+    """A stream resolution failure that retrying won't fix (unavailable video, invalid URL)"""
+
+
+class AuthRequiredError(PermanentExtractionError):
+    """The video is gated behind age verification or a login"""
+
+
+# Error message fragments for age/login gates that don't surface as a typed PyTubeFix exception
+_AUTH_MARKERS = frozenset(("age-restricted", "sign in"))
+
+
+def _is_auth_error(message: str) -> bool:
+    """Check whether an error message points at an age or login restriction"""
+    lowered = message.lower()
+    return any(marker in lowered for marker in _AUTH_MARKERS)
+
+
+def _parse_length_text(length_text: Optional[str]) -> Optional[int]:
+    """Convert a search result length such as '1:02:03' to seconds (None if missing or malformed)"""
+    if not length_text:
+        return None
+    seconds = 0
+    for part in length_text.split(':'):
+        if not part.isdigit():
+            return None
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the stream resolution process pool, creating it on first use (None when disabled)"""
+    global _process_pool
+    if _process_pool is None and YTDL_PROCESS_WORKERS > 0:
+        # Spawn instead of fork: the bot process already runs threads (event loop executors)
+        _process_pool = ProcessPoolExecutor(
+            max_workers=YTDL_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken process pool so the next _get_process_pool() call starts a fresh one"""
+    global _process_pool
+    if _process_pool is pool:
+        _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def _get_extract_semaphore() -> asyncio.Semaphore:
+    """Get the stream resolution semaphore, creating it on first use"""
+    global _extract_semaphore
+    if _extract_semaphore is None:
+        _extract_semaphore = asyncio.Semaphore(EXTRACT_CONCURRENCY)
+    return _extract_semaphore
+
+
+def _extract_data_in_process(url):
+    """
+    Process pool entry point for YTDLSource.extract_data.
+    
+    Most PyTubeFix exceptions (and urllib's HTTPError, which PyTubeFix lets escape) can't be
+    unpickled, and one that can't breaks the whole pool. Every failure is therefore re-raised as
+    an exception that survives the trip back to the bot process.
+    """
+    try:
+        return YTDLSource.extract_data(url)
+    except (AgeRestrictedError, LoginRequired) as e:
+        raise AuthRequiredError(str(e)) from None
+    except VideoUnavailable as e:
+        raise PermanentExtractionError(f"Video is unavailable: {str(e)}") from None
+    except RegexMatchError as e:
+        raise PermanentExtractionError(f"Invalid YouTube URL: {str(e)}") from None
+    except PytubeFixError as e:
+        raise PytubeFixError(str(e)) from None
+    except Exception as e:
+        raise Exception(f"{type(e).__name__}: {e}") from None
+
+
+class YTDLSource(discord.AudioSource):
     """
     Custom audio source class for YouTube downloads using PyTubeFix
+    
+    Wraps an FFmpeg source and carries the video's metadata. Opus sources are passed
+    through untouched, so discord.py sends FFmpeg's packets without re-encoding them.
     """
     
-    def __init__(self, source, *, data, volume=0.5):
-        super().__init__(source, volume)
+    def __init__(self, source, *, data):
+        self.original = source
         self.data = data
         self.title = data.get('title')
         self.url = data.get('url')
@@ -23,9 +153,89 @@ class YTDLSource(discord.PCMVolumeTransformer):
         self.uploader = data.get('uploader')
         self.view_count = data.get('view_count')
         self.webpage_url = data.get('webpage_url', data.get('url', ''))
+    
+    def read(self):
+        return self.original.read()
+    
+    def is_opus(self):
+        return self.original.is_opus()
+    
+    def cleanup(self):
+        self.original.cleanup()
+        
+    @staticmethod
+    def extract_data(url):
+        """
+        Resolve video metadata and the best audio stream URL (blocking)
+        
+        Args:
+            url (str): The YouTube URL to resolve
+            
+        Returns:
+            dict: Video data in the same shape from_url uses for YTDLSource
+        """
+        # Extract video information using PyTubeFix
+        yt = YouTube(url)
         
+        # Prefer the best WebM (Opus) audio stream, which FFmpeg can hand to Discord without transcoding
+        audio_stream = yt.streams.get_audio_only('webm') or yt.streams.filter(only_audio=True).first()
+        if not audio_stream:
+            raise Exception("No audio stream available for this video")
+        
+        # Prepare data dictionary similar to yt-dlp format
+        return {
+            'title': yt.title,
+            'url': audio_stream.url,
+            'acodec': audio_stream.audio_codec,
+            'duration': yt.length,
+            'thumbnail': yt.thumbnail_url,
+            'uploader': yt.author,
+            'view_count': yt.views,
+            'webpage_url': url
+        }
+    
     @classmethod
-    async def from_url(cls, url, *, loop=None, stream=True, timestamp=0, retries=3):
+    async def fetch_data(cls, url, *, loop=None, refresh=False):
+        """
+        Resolve video data on the stream resolution process pool (or the thread pool when it is
+        disabled), using the stream cache when possible
+        
+        Args:
+            url (str): The YouTube URL to resolve
+            loop (asyncio.AbstractEventLoop, optional): Event loop to use
+            refresh (bool, optional): Ignore any cached data (e.g. after a failed attempt). Defaults to False.
+            
+        Returns:
+            dict: Video data as returned by extract_data
+        """
+        if not refresh:
+            cached = _stream_cache.get(url)
+            if cached is not None:
+                return cached
+        
+        loop = loop or asyncio.get_event_loop()
+        async with _get_extract_semaphore():
+            if not refresh:
+                # Another caller may have resolved the same URL while this one waited
+                cached = _stream_cache.get(url)
+                if cached is not None:
+                    return cached
+            
+            executor = _get_process_pool()
+            if executor is None:
+                executor = ytdl_executor
+            try:
+                data = await loop.run_in_executor(executor, _extract_data_in_process, url)
+            except BrokenProcessPool:
+                # A worker died; replace the pool instead of failing every later song, and retry once
+                logger.warning("Stream resolution process pool broke, starting a new one")
+                _discard_process_pool(executor)
+                data = await loop.run_in_executor(_get_process_pool(), _extract_data_in_process, url)
+        _stream_cache.set(url, data)
+        return data
+    
+    @classmethod
+    async def from_url(cls, url, *, loop=None, stream=True, timestamp=0, retries=2):
         """
         Create a YTDLSource from a YouTube URL using PyTubeFix
         
@@ -34,7 +244,7 @@ class YTDLSource(discord.PCMVolumeTransformer):
             loop (asyncio.AbstractEventLoop, optional): Event loop to use
             stream (bool, optional): Whether to stream or download. Defaults to True.
             timestamp (int, optional): Start time in seconds. Defaults to 0.
-            retries (int, optional): Number of retries on failure. Defaults to 3.
+            retries (int, optional): Number of attempts for transient failures. Defaults to 2.
             
         Returns:
             YTDLSource: Audio source object for Discord
@@ -43,77 +253,153 @@ class YTDLSource(discord.PCMVolumeTransformer):
         
         for attempt in range(retries):
             try:
-                # Extract video information using PyTubeFix
-                yt = await loop.run_in_executor(None, YouTube, url)
-                
-                # Get the best audio stream
-                audio_stream = yt.streams.filter(only_audio=True).first()
-                if not audio_stream:
-                    raise Exception("No audio stream available for this video")
-                
-                # Get the stream URL
-                stream_url = audio_stream.url
-                
-                # Prepare data dictionary similar to yt-dlp format
-                data = {
-                    'title': yt.title,
-                    'url': stream_url,
-                    'duration': yt.length,
-                    'thumbnail': yt.thumbnail_url,
-                    'uploader': yt.author,
-                    'view_count': yt.views,
-                    'webpage_url': url
-                }
+                # Retries bypass the cache in case the cached stream URL has gone stale
+                data = await cls.fetch_data(url, loop=loop, refresh=attempt > 0)
+                stream_url = data['url']
                 
-                # Use custom FFmpeg options from config
-                custom_ffmpeg_options = FFMPEG_OPTIONS.copy()
+                # Use FFmpeg options from config, with a cached seek variant when a timestamp is applied
+                custom_ffmpeg_options = _seek_ffmpeg_options(timestamp) if timestamp > 0 else FFMPEG_OPTIONS
                 
-                # Apply timestamp if provided
-                if timestamp > 0:
-                    current_before = custom_ffmpeg_options.get('before_options', '')
-                    custom_ffmpeg_options['before_options'] = f"{current_before} -ss {timestamp}".strip()
+                # Opus input with no volume filter can be copied as-is, skipping both the probe and the re-encode
+                codec = 'opus' if data.get('acodec') == 'opus' and PLAYBACK_VOLUME == 1.0 else None
                 
                 try:
-                    print(f"Creating FFmpegPCMAudio for: {data.get('title', 'Unknown')}")
-                    audio_source = discord.FFmpegPCMAudio(stream_url, **custom_ffmpeg_options)
-                    print(f"Successfully created FFmpegPCMAudio for: {data.get('title', 'Unknown')}")
+                    logger.debug("Creating FFmpegOpusAudio for: %s", data.get('title', 'Unknown'))
+                    # FFmpeg encodes straight to Opus, sparing discord.py a Python-side encode of every frame.
+                    # Spawning FFmpeg (Popen + pipe setup) blocks, so keep it off the event loop
+                    audio_source = await loop.run_in_executor(
+                        ytdl_executor,
+                        functools.partial(discord.FFmpegOpusAudio, stream_url, codec=codec, **custom_ffmpeg_options)
+                    )
+                    logger.debug("Successfully created FFmpegOpusAudio for: %s", data.get('title', 'Unknown'))
                     return cls(audio_source, data=data)
                 except TypeError as type_error:
-                    print(f"TypeError in FFmpegPCMAudio (parameter issue): {type_error}")
-                    print(f"Parameters passed: {custom_ffmpeg_options}")
+                    logger.warning("TypeError in FFmpegOpusAudio (parameter issue): %s", type_error)
+                    logger.debug("Parameters passed: %s", custom_ffmpeg_options)
                     try:
-                        print("Attempting with minimal parameters...")
-                        audio_source = discord.FFmpegPCMAudio(stream_url)
+                        logger.debug("Falling back to FFmpegPCMAudio with minimal parameters...")
+                        audio_source = await loop.run_in_executor(ytdl_executor, discord.FFmpegPCMAudio, stream_url)
+                        # No FFmpeg volume filter here, so scale the PCM in Python if a volume is set
+                        if PLAYBACK_VOLUME != 1.0:
+                            audio_source = discord.PCMVolumeTransformer(audio_source, PLAYBACK_VOLUME)
                         return cls(audio_source, data=data)
                     except Exception as minimal_error:
-                        print(f"Even minimal FFmpegPCMAudio failed: {minimal_error}")
+                        logger.error("Even minimal FFmpegPCMAudio failed: %s", minimal_error)
                         raise Exception(f"FFmpeg parameter error: {type_error}")
                 except Exception as ffmpeg_error:
-                    print(f"FFmpegPCMAudio failed with general error: {ffmpeg_error}")
-                    print(f"Error type: {type(ffmpeg_error)}")
+                    logger.error("FFmpegOpusAudio failed with general error (%s): %s", type(ffmpeg_error).__name__, ffmpeg_error)
                     raise Exception(f"Failed to create audio source: {ffmpeg_error}")
                     
+            except AuthRequiredError:
+                raise Exception("This video is age-restricted or requires authentication")
+            except PermanentExtractionError:
+                raise
             except VideoUnavailable as e:
                 raise Exception(f"Video is unavailable: {str(e)}")
             except RegexMatchError as e:
                 raise Exception(f"Invalid YouTube URL: {str(e)}")
-            except PytubeFixError as e:
-                print(f"PyTubeFix error on attempt {attempt + 1}: {e}")
-                if attempt == retries - 1:
-                    raise Exception(f"Failed to load video after {retries} attempts: {str(e)}")
             except Exception as e:
-                print(f"Attempt {attempt + 1} failed: {e}")
+                error_msg = str(e)
+                if _is_auth_error(error_msg):
+                    # Untyped age-restricted and sign-in walls won't clear up on retry either
+                    raise Exception("This video is age-restricted or requires authentication")
+                logger.warning("Attempt %d failed: %s", attempt + 1, e)
                 if attempt == retries - 1:
                     # Provide more helpful error messages
-                    error_msg = str(e)
-                    if "age-restricted" in error_msg.lower() or "sign in" in error_msg.lower():
-                        raise Exception("This video is age-restricted or requires authentication")
+                    if isinstance(e, PytubeFixError):
+                        raise Exception(f"Failed to load video after {retries} attempts: {error_msg}")
                     elif "FFmpeg" in error_msg or "ffmpeg" in error_msg:
                         raise Exception(f"Audio processing error - please check if FFmpeg is properly installed: {error_msg}")
                     else:
                         raise Exception(f"Failed to load audio after {retries} attempts: {error_msg}")
-                # Exponential backoff for retries
-                await asyncio.sleep(2 ** attempt)
+                # Capped exponential backoff for retries
+                await asyncio.sleep(min(2 ** attempt, 4))
+    
+    @staticmethod
+    def _extract_title(url):
+        """Look up a video's title without resolving its streams (blocking)"""
+        return YouTube(url).title, url
+    
+    @classmethod
+    def _extract_first_result(cls, query):
+        """Look up the first search result's title and URL from the raw search response (blocking)"""
+        results = cls._extract_search_results(query, 1)
+        if not results:
+            return None
+        title, watch_url, _ = results[0]
+        return title, watch_url
+    
+    @staticmethod
+    def _extract_search_results(query, max_results):
+        """
+        Look up the top search results from the raw search response (blocking)
+        
+        Search.results wraps every hit in a YouTube object that only knows its URL, so reading
+        a title or length from it costs a player request per result. The videoRenderer entries
+        of the search response already carry both, so parsing them needs a single request.
+        
+        Args:
+            query (str): The search query
+            max_results (int): Maximum number of results
+            
+        Returns:
+            tuple: (title, watch_url, length_text) tuples; length_text is None for live streams
+        """
+        raw = Search(query).fetch_query()
+        sections = (
+            raw.get('contents', {})
+            .get('twoColumnSearchResultsRenderer', {})
+            .get('primaryContents', {})
+            .get('sectionListRenderer', {})
+            .get('contents', [])
+        )
+        
+        results = []
+        for section in sections:
+            for item in section.get('itemSectionRenderer', {}).get('contents', []):
+                video = item.get('videoRenderer')
+                if not video:
+                    continue  # Channels, playlists, shelves and ads
+                try:
+                    title = video['title']['runs'][0]['text']
+                    watch_url = f"https://youtube.com/watch?v={video['videoId']}"
+                except (KeyError, IndexError) as e:
+                    logger.warning("Error processing search result: %s", e)
+                    continue
+                results.append((title, watch_url, video.get('lengthText', {}).get('simpleText')))
+                if len(results) >= max_results:
+                    return tuple(results)
+        return tuple(results)
+    
+    @classmethod
+    async def resolve_title(cls, url, *, loop=None):
+        """
+        Look up only the title of a YouTube video, without resolving its streams
+        
+        Args:
+            url (str): The YouTube URL
+            loop (asyncio.AbstractEventLoop, optional): Event loop to use
+            
+        Returns:
+            tuple: (title, url)
+        """
+        loop = loop or asyncio.get_event_loop()
+        return await loop.run_in_executor(ytdl_executor, cls._extract_title, url)
+    
+    @classmethod
+    async def first_search(cls, query, *, loop=None):
+        """
+        Find the first YouTube search result for a query
+        
+        Args:
+            query (str): The search query
+            loop (asyncio.AbstractEventLoop, optional): Event loop to use
+            
+        Returns:
+            tuple: (title, watch_url) of the first result, or None if nothing was found
+        """
+        loop = loop or asyncio.get_event_loop()
+        return await loop.run_in_executor(ytdl_executor, cls._extract_first_result, query)
     
     @classmethod
     async def search_source(cls, search_query, *, loop=None, max_results=5):
@@ -131,91 +417,109 @@ class YTDLSource(discord.PCMVolumeTransformer):
         loop = loop or asyncio.get_event_loop()
         
         try:
-            # Search for videos using PyTubeFix
-            search = await loop.run_in_executor(None, Search, search_query)
-            results = []
-            result_message = ""
-            
-            # Get up to max_results results
-            for i, video in enumerate(search.results[:max_results]):
-                try:
-                    result_data = {
-                        'title': video.title,
-                        'url': video.watch_url,
-                        'duration': video.length,
-                        'thumbnail': video.thumbnail_url,
-                        'uploader': video.author,
-                        'view_count': video.views,
-                        'webpage_url': video.watch_url
-                    }
-                    results.append(result_data)
-                    
-                    # Format duration for display
-                    duration_str = cls._format_duration(video.length)
-                    result_message += f"{i+1}: {video.title} ({duration_str})\n"
-                    
-                except Exception as e:
-                    print(f"Error processing search result {i}: {e}")
-                    continue
+            # Search for videos using PyTubeFix, parsing titles and lengths from the one search response
+            cache_key = (search_query, max_results)
+            hits = _search_cache.get(cache_key)
+            if hits is None:
+                hits = await loop.run_in_executor(ytdl_executor, cls._extract_search_results, search_query, max_results)
+                _search_cache.set(cache_key, hits)
+            results = [
+                {
+                    'title': title,
+                    'url': watch_url,
+                    'duration': _parse_length_text(length_text),
+                    'webpage_url': watch_url
+                }
+                for title, watch_url, length_text in hits
+            ]
             
-            return results, result_message if results else "No search results found."
+            if not results:
+                return results, "No search results found."
+            result_message = "".join(
+                f"{i}: {title} ({length_text or 'Unknown'})\n"
+                for i, (title, _, length_text) in enumerate(hits, start=1)
+            )
+            return results, result_message
                 
         except Exception as e:
-            print(f"Search failed: {e}")
+            logger.error("Search failed: %s", e)
             return [], f"An error occurred: {str(e)}"
     
+    @staticmethod
+    def _load_playlist(url, limit):
+        """Fetch playlist details and its first `limit` videos (blocking)"""
+        playlist = Playlist(url)
+        return playlist.title or 'Unknown Playlist', playlist.owner or 'Unknown', list(playlist.videos[:limit])
+    
+    @staticmethod
+    def _extract_video_meta(video):
+        """Read a playlist video's metadata (blocking, each attribute may trigger a request)"""
+        return {
+            'title': video.title,
+            'url': video.watch_url,
+            'duration': video.length,
+            'thumbnail': video.thumbnail_url,
+            'uploader': video.author,
+            'view_count': video.views,
+            'webpage_url': video.watch_url
+        }
+    
     @classmethod
-    async def get_playlist(cls, url, *, loop=None, limit=30):
+    async def get_playlist_streaming(cls, url, *, loop=None, limit=30):
         """
-        Extract playlist information from YouTube using PyTubeFix
+        Yield playlist entries in order as soon as each one is resolved
+        
+        All videos are resolved concurrently, so the first entry is available after roughly one
+        video's latency instead of the whole playlist's. A video that fails or takes longer than
+        EXTRACT_TIMEOUT to resolve is skipped. A playlist whose videos all resolved is cached, so
+        requesting it again replays its entries without any lookups.
         
         Args:
             url (str): The YouTube playlist URL
             loop (asyncio.AbstractEventLoop, optional): Event loop to use
             limit (int, optional): Maximum number of videos to extract. Defaults to 30.
             
-        Returns:
-            dict: Playlist information with entries, or None if failed
+        Yields:
+            dict: Entry data for each playlist video that could be resolved
+            
+        Raises:
+            asyncio.TimeoutError: If loading the playlist takes longer than PLAYLIST_EXTRACT_TIMEOUT
         """
+        cached = _playlist_cache.get((url, limit))
+        if cached is not None:
+            for entry in cached:
+                yield entry
+            return
+        
         loop = loop or asyncio.get_event_loop()
         
         try:
-            # Extract playlist information using PyTubeFix
-            playlist = await loop.run_in_executor(None, Playlist, url)
-            
-            entries = []
-            for i, video in enumerate(playlist.videos[:limit]):
+            _, _, videos = await asyncio.wait_for(
+                loop.run_in_executor(ytdl_executor, cls._load_playlist, url, limit),
+                timeout=PLAYLIST_EXTRACT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            logger.error("Playlist extraction failed: %s", e)
+            return
+        
+        futures = [loop.run_in_executor(ytdl_executor, cls._extract_video_meta, video) for video in videos]
+        entries = []
+        try:
+            for i, future in enumerate(futures):
                 try:
-                    entry_data = {
-                        'title': video.title,
-                        'url': video.watch_url,
-                        'duration': video.length,
-                        'thumbnail': video.thumbnail_url,
-                        'uploader': video.author,
-                        'view_count': video.views,
-                        'webpage_url': video.watch_url
-                    }
-                    entries.append(entry_data)
+                    entry = await asyncio.wait_for(future, timeout=EXTRACT_TIMEOUT)
                 except Exception as e:
-                    print(f"Error processing playlist video {i}: {e}")
+                    logger.warning("Error processing playlist video %d: %s", i, e)
                     continue
+                entries.append(entry)
+                yield entry
             
-            return {
-                'title': playlist.title or 'Unknown Playlist',
-                'entries': entries,
-                'uploader': playlist.owner or 'Unknown',
-                'entry_count': len(entries)
-            }
-                
-        except Exception as e:
-            print(f"Playlist extraction failed: {e}")
-            return None
-    
-    @staticmethod
-    def _format_duration(duration_seconds):
-        """Format duration in seconds to MM:SS format"""
-        if not duration_seconds:
-            return "Unknown"
-            
-        minutes, seconds = divmod(int(duration_seconds), 60)
-        return f"{minutes}:{seconds:02d}"
\ No newline at end of file
+            # A playlist with skipped videos isn't cached, so a transient failure doesn't stick
+            if entries and len(entries) == len(futures):
+                _playlist_cache.set((url, limit), tuple(entries))
+        finally:
+            # Stop resolving videos nobody will consume (e.g. the queue was cleared)
+            for future in futures:
+                future.cancel()